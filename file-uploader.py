@@ -1,13 +1,36 @@
 import os
 import argparse
+import asyncio
 import logging
 import json
 import hashlib
+import http.client
 import time
-from typing import List, Optional, Dict, Set
-import mimetypes
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional, Dict, Set, Iterable, Iterator, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from stat import S_ISREG
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    # Optional: streams multipart bodies from disk instead of building them in memory
+    from requests_toolbelt import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+try:
+    # Optional: reads and writes large mapping and tracking files several times faster than json
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    # Optional: hashes files for change detection many times faster than MD5
+    import xxhash
+except ImportError:
+    xxhash = None
 from pathlib import Path
+from urllib.parse import urlsplit, urlencode
 from datetime import datetime
 
 # Configure logging
@@ -22,158 +45,615 @@ logging.basicConfig(
 
 logger = logging.getLogger('file_uploader')
 
+# Files above this size are uploaded through the low-concurrency large-file pool
+SMALL_FILE_THRESHOLD = 8 * 1024 * 1024
+
+# Large enough that hashing is bound by memory bandwidth rather than per-read overhead
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Retries happen inside the connection adapter, so the happy path pays nothing for them.
+# POST is included so that a transient failure does not drop an upload.
+RETRY_POLICY = Retry(
+    total=5,
+    connect=3,
+    read=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+    respect_retry_after_header=True,
+    # Hand the last error response back so raise_for_status can report it
+    raise_on_status=False
+)
+
+# Uploads carry the file's content hash in this header, and the server reports the stored
+# file's hash in it on HEAD requests, so unchanged content does not need to be re-sent
+CONTENT_HASH_HEADER = 'X-Content-Hash'
+
+# Directories that never contain documents worth syncing
+DEFAULT_IGNORE_DIRS = frozenset({'.git', '.svn', '__pycache__', 'node_modules', '.venv'})
+
+
+def _json_loads(data: bytes):
+    """
+    Parse JSON from bytes with orjson when available, falling back to the json module.
+
+    Both raise json.JSONDecodeError on invalid input; orjson's error is a subclass of it.
+    """
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FileTask(NamedTuple):
+    """
+    A supported file found while scanning a directory.
+
+    Everything an upload needs is filled in once from the directory scan, so the
+    file is never stat'ed, classified or split into its name again further down the pipeline.
+    """
+    path: str
+    name: str
+    size: int
+    mtime: float
+    ext: str
+    parse_engine: str
+
+
+class RewindableMultipartEncoder:
+    """
+    Streaming multipart body that can be rewound when urllib3 retries a request.
+
+    MultipartEncoder cannot seek, so a retried upload would send an exhausted body.
+    urllib3 records tell() before sending and calls seek() with that position before a
+    retry; seeking rebuilds the encoder from the start with the same boundary.
+    """
+
+    def __init__(self, fields: List[Tuple[str, Tuple]]):
+        self._fields = fields
+        self._encoder = MultipartEncoder(fields=fields)
+        self.content_type = self._encoder.content_type
+        self.len = self._encoder.len
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._encoder.read(size)
+        self._position += len(data)
+        return data
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("Multipart body can only be rewound to the start")
+        for _, (_, fileobj, _) in self._fields:
+            fileobj.seek(0)
+        self._encoder = MultipartEncoder(fields=self._fields, boundary=self._encoder.boundary_value)
+        self._position = 0
+
+
 class FileTracker:
-    """Track file changes between syncs."""
+    """
+    Track file changes between syncs.
+
+    Tracking data maps each local path to {relative file path: [file_id, size, mtime, hash]}.
+    Keys starting with "__" are reserved for sync-wide state.
+    """
+    
+    # Positions of the fields in a tracking record
+    FILE_ID, SIZE, MTIME, HASH = range(4)
+    # Maps each local path to the time its files were last all hashed and compared
+    LAST_FULL_CHECK_KEY = "__last_full_check__"
+    # Maps each local path to the digest of its files and remote listing after its last clean sync
+    DIR_DIGEST_KEY = "__dir_digest__"
     
     def __init__(self, tracking_file: str = "file_tracking.json"):
         """Initialize with tracking file path."""
         self.tracking_file = tracking_file
+        self._dirty = False
         self.tracking_data = self._load_tracking_data()
     
     def _load_tracking_data(self) -> Dict:
         """Load tracking data from file or initialize empty dict."""
         if os.path.exists(self.tracking_file):
             try:
-                with open(self.tracking_file, 'r') as f:
-                    return json.load(f)
+                with open(self.tracking_file, 'rb') as f:
+                    data = f.read()
+                return self._migrate(_json_loads(data))
             except json.JSONDecodeError:
                 logger.error(f"Invalid tracking file format: {self.tracking_file}")
                 return {}
         return {}
     
-    def _save_tracking_data(self):
-        """Save tracking data to file."""
-        with open(self.tracking_file, 'w') as f:
-            json.dump(self.tracking_data, f, indent=2)
+    def _migrate(self, tracking_data: Dict) -> Dict:
+        """Convert records from the older format, a dict per file keyed by its full path."""
+        for local_path, records in tracking_data.items():
+            if local_path.startswith("__"):
+                continue
+            migrated = {}
+            for file_path, record in records.items():
+                if isinstance(record, dict):
+                    file_path = self._relative_path(local_path, file_path)
+                    record = [record["file_id"], record["size"], record["mtime"], record.get("hash")]
+                    self._dirty = True
+                migrated[file_path] = record
+            tracking_data[local_path] = migrated
+        return tracking_data
+    
+    @staticmethod
+    def _relative_path(local_path: str, file_path: str) -> str:
+        """Return the path a file is tracked under, relative to its local directory."""
+        prefix = os.path.join(local_path, '')
+        if file_path.startswith(prefix):
+            return file_path[len(prefix):]
+        return os.path.relpath(file_path, local_path)
+    
+    def _get_record(self, local_path: str, file_path: str) -> Optional[List]:
+        """Return the tracking record of a file, or None if it is not tracked."""
+        return self.tracking_data.get(local_path, {}).get(self._relative_path(local_path, file_path))
+    
+    def flush(self):
+        """
+        Save tracking data to file if it changed since the last flush.
+
+        Updates only change the in-memory data, so the file is written once per sync
+        instead of once per file.
+        """
+        if not self._dirty:
+            return
+        if orjson is not None:
+            data = orjson.dumps(self.tracking_data, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(self.tracking_data, indent=2).encode('utf-8')
+        # Write a temporary file and rename it over the old one, so a crash mid-write
+        # cannot leave a truncated tracking file behind
+        temp_file = self.tracking_file + '.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        os.replace(temp_file, self.tracking_file)
+        self._dirty = False
     
     def compute_file_hash(self, file_path: str) -> Optional[str]:
-        """Compute MD5 hash of file content."""
+        """
+        Compute a hash of file content, prefixed with the algorithm name.
+
+        The hash only detects changes, so XXH3 is used when xxhash is installed and MD5
+        otherwise. The prefix keeps hashes made with different algorithms from matching.
+        """
         try:
-            md5_hash = hashlib.md5()
-            with open(file_path, "rb") as f:
-                # Read file in chunks for memory efficiency
-                for chunk in iter(lambda: f.read(4096), b""):
-                    md5_hash.update(chunk)
-            return md5_hash.hexdigest()
+            if xxhash is not None:
+                algorithm, file_hash = "xxh3_128", xxhash.xxh3_128()
+            else:
+                algorithm, file_hash = "md5", hashlib.md5()
+            # Read the file in chunks into one reused buffer, rather than allocating a new bytes per chunk
+            buffer = bytearray(HASH_CHUNK_SIZE)
+            view = memoryview(buffer)
+            with open(file_path, "rb", buffering=0) as f:
+                size = f.readinto(buffer)
+                while size:
+                    file_hash.update(view[:size])
+                    size = f.readinto(buffer)
+            return f"{algorithm}:{file_hash.hexdigest()}"
         except Exception as e:
             logger.error(f"Error computing hash for {file_path}: {str(e)}")
             return None
     
-    def get_file_metadata(self, file_path: str) -> Optional[Dict]:
-        """Get file metadata including size, modification time, and hash."""
+    def get_file_metadata(self, file_path: str, size: Optional[int] = None,
+                          mtime: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get file metadata including size and modification time.
+
+        The hash is left as None so that reading the file can be deferred until a hash is
+        actually needed. Pass the size and mtime obtained while scanning the directory to
+        avoid stat'ing the file again.
+        """
         try:
-            stat = os.stat(file_path)
+            if size is None or mtime is None:
+                stat = os.stat(file_path)
+                size, mtime = stat.st_size, stat.st_mtime
             return {
                 "path": file_path,
-                "size": stat.st_size,
-                "mtime": stat.st_mtime,
-                "hash": self.compute_file_hash(file_path)
+                "size": size,
+                "mtime": mtime,
+                "hash": None
             }
         except Exception as e:
             logger.error(f"Error getting metadata for {file_path}: {str(e)}")
             return None
     
     def update_file_tracking(self, local_path: str, file_id: str, file_metadata: Dict):
-        """Update tracking data for a file."""
+        """Update tracking data for a file, hashing it first if the metadata has no hash yet."""
         if local_path not in self.tracking_data:
             self.tracking_data[local_path] = {}
         
-        self.tracking_data[local_path][file_metadata["path"]] = {
-            "file_id": file_id,
-            "size": file_metadata["size"],
-            "mtime": file_metadata["mtime"],
-            "hash": file_metadata["hash"],
-            "last_synced": time.time()
-        }
-        self._save_tracking_data()
+        file_hash = file_metadata["hash"]
+        if file_hash is None:
+            file_hash = self.compute_file_hash(file_metadata["path"])
+        
+        relative_path = self._relative_path(local_path, file_metadata["path"])
+        self.tracking_data[local_path][relative_path] = [
+            file_id, file_metadata["size"], file_metadata["mtime"], file_hash
+        ]
+        self._dirty = True
     
     def remove_file_tracking(self, local_path: str, file_path: str):
         """Remove a file from tracking data."""
-        if local_path in self.tracking_data and file_path in self.tracking_data[local_path]:
-            del self.tracking_data[local_path][file_path]
-            self._save_tracking_data()
+        records = self.tracking_data.get(local_path, {})
+        if records.pop(self._relative_path(local_path, file_path), None) is not None:
+            self._dirty = True
     
-    def is_file_changed(self, local_path: str, file_path: str, file_metadata: Dict) -> bool:
-        """Check if file has changed since last sync."""
-        if local_path not in self.tracking_data or file_path not in self.tracking_data[local_path]:
+    def is_file_changed(self, local_path: str, file_path: str, file_metadata: Dict,
+                        verify_hash: bool = False) -> bool:
+        """
+        Check if file has changed since last sync.
+
+        Matching size and mtime are trusted unless verify_hash is set, in which case the
+        hash in file_metadata is compared with the stored one as well.
+        """
+        tracked_data = self._get_record(local_path, file_path)
+        if tracked_data is None:
             return True  # New file
         
-        tracked_data = self.tracking_data[local_path][file_path]
-        
         # First check quick metadata (size and mtime)
-        if tracked_data["size"] != file_metadata["size"] or tracked_data["mtime"] != file_metadata["mtime"]:
-            logger.debug(f"File {file_path} changed: size/mtime differs")
-            logger.debug(f"  Tracked: size={tracked_data['size']}, mtime={tracked_data['mtime']}")
-            logger.debug(f"  Current: size={file_metadata['size']}, mtime={file_metadata['mtime']}")
+        tracked_size, tracked_mtime = tracked_data[self.SIZE], tracked_data[self.MTIME]
+        if tracked_size != file_metadata["size"] or tracked_mtime != file_metadata["mtime"]:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"File {file_path} changed: size/mtime differs")
+                logger.debug(f"  Tracked: size={tracked_size}, mtime={tracked_mtime}")
+                logger.debug(f"  Current: size={file_metadata['size']}, mtime={file_metadata['mtime']}")
             return True
         
+        if not verify_hash or file_metadata["hash"] is None:
+            logger.debug("File %s unchanged", file_path)
+            return False
+        
         # If metadata matches but hash differs, file content has changed
-        if tracked_data["hash"] != file_metadata["hash"]:
-            logger.debug(f"File {file_path} changed: hash differs")
-            logger.debug(f"  Tracked hash: {tracked_data['hash']}")
-            logger.debug(f"  Current hash: {file_metadata['hash']}")
+        if tracked_data[self.HASH] != file_metadata["hash"]:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"File {file_path} changed: hash differs")
+                logger.debug(f"  Tracked hash: {tracked_data[self.HASH]}")
+                logger.debug(f"  Current hash: {file_metadata['hash']}")
             return True
         
-        logger.debug(f"File {file_path} unchanged")
+        logger.debug("File %s unchanged", file_path)
         return False
     
+    def matches_last_sync(self, local_path: str, file_path: str, size: int, mtime: float) -> bool:
+        """Check whether size and mtime still match the last sync, without reading the file."""
+        tracked_data = self._get_record(local_path, file_path)
+        return (tracked_data is not None
+                and tracked_data[self.SIZE] == size
+                and tracked_data[self.MTIME] == mtime)
+    
+    def full_check_due(self, local_path: str, interval_days: float) -> bool:
+        """Check whether the files of a local path are due to be hashed and compared again."""
+        if interval_days <= 0:
+            return False
+        last_check = self.tracking_data.get(self.LAST_FULL_CHECK_KEY, {}).get(local_path)
+        return last_check is None or time.time() - last_check >= interval_days * 86400
+    
+    def mark_full_check(self, local_path: str):
+        """Record that all files of a local path were just hashed and compared."""
+        self.tracking_data.setdefault(self.LAST_FULL_CHECK_KEY, {})[local_path] = time.time()
+        self._dirty = True
+
+    def get_dir_digest(self, local_path: str) -> Optional[str]:
+        """Return the directory digest stored for a local path by its last clean sync."""
+        return self.tracking_data.get(self.DIR_DIGEST_KEY, {}).get(local_path)
+
+    def set_dir_digest(self, local_path: str, digest: Optional[str]):
+        """Store the directory digest for a local path, or drop it if digest is None."""
+        digests = self.tracking_data.setdefault(self.DIR_DIGEST_KEY, {})
+        if digests.get(local_path) == digest:
+            return
+        if digest is None:
+            del digests[local_path]
+        else:
+            digests[local_path] = digest
+        self._dirty = True
+    
     def get_tracked_files(self, local_path: str) -> Set[str]:
         """Get set of tracked files for a local path."""
-        if local_path in self.tracking_data:
-            return set(self.tracking_data[local_path].keys())
-        return set()
+        prefix = os.path.join(local_path, '')
+        return {prefix + relative_path for relative_path in self.tracking_data.get(local_path, {})}
     
     def get_file_id(self, local_path: str, file_path: str) -> Optional[str]:
         """Get remote file ID for a tracked file."""
-        if local_path in self.tracking_data and file_path in self.tracking_data[local_path]:
-            return self.tracking_data[local_path][file_path]["file_id"]
-        return None
+        tracked_data = self._get_record(local_path, file_path)
+        return tracked_data[self.FILE_ID] if tracked_data is not None else None
 
 
 class FileUploader:
+    supported_types = frozenset({'.pdf', '.docx', '.txt', '.pptx', '.xlsx'})
+    # Define which file types use ultraparse
+    ultraparse_types = frozenset({'.pdf', '.docx', '.pptx'})
+    # Spelled out rather than looked up with mimetypes, which reads the system MIME database
+    _mime_by_ext = {
+        '.pdf': 'application/pdf',
+        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        '.txt': 'text/plain',
+        '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+    # Longest first, so a single endswith() call always matches the most specific suffix
+    _supported_suffixes = tuple(sorted(supported_types, key=len, reverse=True))
+
     def __init__(self, base_url: str, api_key: str, folder_mapping: Dict[str, str], 
-                 tracker: FileTracker, verify_ssl: bool = False):
+                 tracker: FileTracker, verify_ssl: bool = False, parallel: int = 8,
+                 ignore_dirs: Optional[Iterable[str]] = None, include_hidden: bool = False,
+                 backend: str = 'requests', large_file_threshold: int = SMALL_FILE_THRESHOLD,
+                 large_file_workers: int = 4, batch_size: int = 0, follow_symlinks: bool = False,
+                 force: bool = False, zero_copy: bool = False, stat_workers: int = 0,
+                 full_check_interval: float = 0):
         """Initialize the FileUploader with configuration."""
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.folder_mapping = folder_mapping
         self.tracker = tracker
         self.verify_ssl = verify_ssl
-        self.supported_types = {'.pdf', '.docx', '.txt', '.pptx', '.xlsx'}
-        # Define which file types use ultraparse
-        self.ultraparse_types = {'.pdf', '.docx', '.pptx'}
+        self.parallel = parallel
+        self.backend = backend
+        self.large_file_threshold = large_file_threshold
+        self.large_file_workers = large_file_workers
+        self.batch_size = batch_size
+        # Small uploads are latency-bound and benefit from many requests in flight, while
+        # large uploads are bandwidth-bound and would only starve each other, so each
+        # size class gets its own pool
+        self.pool = ThreadPoolExecutor(max_workers=parallel)
+        self.large_pool = ThreadPoolExecutor(max_workers=large_file_workers)
+        # Hashing releases the GIL and reads files independently, so it runs on its own pool
+        self.hash_pool = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+        # On network shares every stat is a round trip, so overlapping them pays off there
+        self.stat_pool = ThreadPoolExecutor(max_workers=stat_workers) if stat_workers > 0 else None
+        self._connection_limit = (parallel + large_file_workers) * 2
+        self.ignore_dirs = DEFAULT_IGNORE_DIRS.union(ignore_dirs or ())
+        self.include_hidden = include_hidden
+        self.follow_symlinks = follow_symlinks
+        self.force = force
+        self.full_check_interval = full_check_interval
+        # Remote listings fetched at the start of a directory sync, keyed by folder ID
+        self._remote_cache = {}
+        # sendfile() can only hand file pages straight to the socket when no TLS layer sits in between
+        self.zero_copy = zero_copy and self.base_url.startswith('http://')
+        if zero_copy and not self.zero_copy:
+            logger.warning("Zero-copy uploads require a plain http:// base URL, using multipart uploads instead")
+        # fwalk stats entries relative to an open directory fd; it never follows symlinks below the root
+        self._use_fwalk = hasattr(os, 'fwalk') and os.stat in os.supports_dir_fd and not follow_symlinks
+        # Only a handful of extensions are supported, so resolve the parser once for each
+        self._engine_by_ext = {ext: ('ultraparse' if ext in self.ultraparse_types else 'tika')
+                               for ext in self.supported_types}
         self.headers = {
             'Authorization': f'Bearer {api_key}',
             'Accept': 'application/json'
         }
+        self.session = self._build_session()
 
         if not verify_ssl:
             # Disable SSL verification warnings if we're not verifying
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    def validate_file(self, file_path: str) -> bool:
-        """Validate if the file type is supported and file exists."""
-        if not os.path.exists(file_path):
-            logger.error(f"File does not exist: {file_path}")
-            return False
+    def _build_session(self):
+        """
+        Create a keep-alive session shared by all requests and upload workers.
 
-        file_extension = os.path.splitext(file_path)[1].lower()
-        if file_extension not in self.supported_types:
-            logger.error(f"Unsupported file type: {file_extension}")
-            return False
+        Returns a requests.Session, or an httpx.Client with HTTP/2 enabled when an
+        httpx backend is selected, so concurrent uploads can share one connection.
+        """
+        if self.backend in ('httpx', 'httpx-async'):
+            import httpx
+            # httpx logs every request at INFO, so only let it through with verbose logging
+            logging.getLogger('httpx').setLevel(
+                logging.DEBUG if logger.isEnabledFor(logging.DEBUG) else logging.WARNING)
+            self._http_errors = (httpx.HTTPError,)
+            return httpx.Client(**self._httpx_options())
+
+        self._http_errors = (requests.exceptions.RequestException,)
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.verify = self.verify_ssl
+        adapter = HTTPAdapter(
+            pool_connections=self.parallel,
+            pool_maxsize=self._connection_limit,
+            max_retries=RETRY_POLICY
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _httpx_options(self) -> Dict:
+        """Keyword arguments shared by the sync and async httpx clients."""
+        import httpx
+        return {
+            'http2': True,
+            'verify': self.verify_ssl,
+            'headers': self.headers,
+            'limits': httpx.Limits(max_connections=self._connection_limit,
+                                   max_keepalive_connections=self._connection_limit),
+            'timeout': httpx.Timeout(60.0, connect=10.0)
+        }
+
+    def close(self):
+        """Shut down the upload and hashing worker pools and close pooled connections."""
+        self.pool.shutdown()
+        self.large_pool.shutdown()
+        self.hash_pool.shutdown()
+        if self.stat_pool is not None:
+            self.stat_pool.shutdown()
+        self.session.close()
+
+    @staticmethod
+    def _extension(filename: str) -> str:
+        """Return the lowercase extension of a file name including the dot, or '' if it has none."""
+        _, dot, suffix = filename.rpartition('.')
+        return dot + suffix.lower() if dot else ''
+
+    def _make_task(self, file_path: str, name: str, ext: str, file_stat: os.stat_result) -> FileTask:
+        """Build the FileTask for a file from its name, lowercase extension and the stat result from the scan."""
+        return FileTask(file_path, name, file_stat.st_size, file_stat.st_mtime, ext, self._engine_by_ext.get(ext))
+
+    def _iter_files(self, root: str, excluded: Set[Tuple[int, int]] = frozenset()) -> Iterator[FileTask]:
+        """
+        Yield a FileTask for every supported regular file below root.
+
+        Uses os.fwalk on POSIX systems and an os.scandir walk elsewhere or when
+        following symlinks. Ignored and hidden directories are pruned before they are read,
+        as are the directories identified by (st_dev, st_ino) in excluded.
+        """
+        if self._use_fwalk:
+            return self._iter_files_fwalk(root, excluded)
+        return self._iter_files_scandir(root, excluded)
+
+    def _stat_all(self, stat, items: List) -> Iterator:
+        """
+        Call stat on each item, yielding its result or the OSError it raised, in order.
+
+        With stat workers the calls run concurrently on the stat pool, otherwise one at a time.
+        """
+        def try_stat(item):
+            try:
+                return stat(item)
+            except OSError as e:
+                return e
+
+        if self.stat_pool is None or len(items) < 2:
+            return map(try_stat, items)
+        return self.stat_pool.map(try_stat, items)
+
+    def _iter_files_fwalk(self, root: str, excluded: Set[Tuple[int, int]]) -> Iterator[FileTask]:
+        """
+        Walk with os.fwalk, stat'ing each file relative to its open directory fd.
+
+        This avoids resolving the full path through every ancestor directory for each
+        file. Directories already seen by (st_dev, st_ino), e.g. through a bind mount,
+        are skipped.
+        """
+        def log_error(e: OSError):
+            logger.error(f"Error scanning directory {e.filename}: {str(e)}")
 
-        return True
+        visited = set()
+        # fwalk does not follow a symlinked top directory and would yield nothing for it; the
+        # trailing separator makes it resolve the root while keeping the paths below it unchanged
+        for dirpath, dirnames, filenames, dirfd in os.fwalk(os.path.join(root, ''), onerror=log_error):
+            dir_stat = os.fstat(dirfd)
+            dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+            if dir_key in excluded:
+                logger.debug("Skipping separately mapped directory: %s", dirpath)
+                dirnames[:] = []
+                continue
+            if dir_key in visited:
+                logger.warning(f"Skipping already visited directory: {dirpath}")
+                dirnames[:] = []
+                continue
+            visited.add(dir_key)
+
+            # Prune in place so fwalk never opens ignored or hidden directories
+            dirnames[:] = [name for name in dirnames
+                           if name not in self.ignore_dirs and (self.include_hidden or not name.startswith('.'))]
+
+            # Join the directory part once; each file path is then a single concatenation
+            prefix = os.path.join(dirpath, '')
+            names, lower_names = [], []
+            for name in filenames:
+                lower_name = name.lower()
+                if lower_name.endswith(self._supported_suffixes):
+                    names.append(name)
+                    lower_names.append(lower_name)
+
+            # All stats finish before fwalk moves on and closes dirfd
+            file_stats = self._stat_all(lambda name: os.stat(name, dir_fd=dirfd, follow_symlinks=False), names)
+            for name, lower_name, file_stat in zip(names, lower_names, file_stats):
+                if isinstance(file_stat, OSError):
+                    logger.error(f"Error reading file {prefix + name}: {str(file_stat)}")
+                    continue
+                # Symlinks, sockets and other special files are not synced
+                if S_ISREG(file_stat.st_mode):
+                    # Every supported suffix has a single dot, so the last dot starts the matched one
+                    yield self._make_task(prefix + name, name, lower_name[lower_name.rfind('.'):], file_stat)
+
+    def _iter_files_scandir(self, root: str, excluded: Set[Tuple[int, int]]) -> Iterator[FileTask]:
+        """
+        Walk with os.scandir, using the entry types cached from the directory listing.
 
-    def upload_file(self, file_path: str, folder_id: str) -> Optional[str]:
-        """Upload a single file to the API. Returns the file ID if successful."""
-        if not self.validate_file(file_path):
+        Symlinks are skipped unless follow_symlinks is set. Each directory is entered at
+        most once, identified by (st_dev, st_ino), so symlink or bind-mount loops cannot
+        make the walk run forever.
+        """
+        follow = self.follow_symlinks
+        root_stat = os.stat(root)
+        visited = {(root_stat.st_dev, root_stat.st_ino)}
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            file_entries = []  # (entry, lowercase name) of supported files
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=follow):
+                            # Prune ignored and hidden directories before descending into them
+                            name = entry.name
+                            if name in self.ignore_dirs or (not self.include_hidden and name.startswith('.')):
+                                continue
+                            try:
+                                dir_stat = os.stat(entry.path, follow_symlinks=follow)
+                            except OSError as e:
+                                logger.error(f"Error reading directory {entry.path}: {str(e)}")
+                                continue
+                            dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+                            if dir_key in excluded:
+                                logger.debug("Skipping separately mapped directory: %s", entry.path)
+                                continue
+                            if dir_key in visited:
+                                logger.warning(f"Skipping already visited directory: {entry.path}")
+                                continue
+                            visited.add(dir_key)
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=follow):
+                            lower_name = entry.name.lower()
+                            if lower_name.endswith(self._supported_suffixes):
+                                file_entries.append((entry, lower_name))
+            except OSError as e:
+                logger.error(f"Error scanning directory {directory}: {str(e)}")
+
+            file_stats = self._stat_all(lambda entry: entry.stat(follow_symlinks=follow),
+                                        [entry for entry, _ in file_entries])
+            for (entry, lower_name), file_stat in zip(file_entries, file_stats):
+                if isinstance(file_stat, OSError):
+                    logger.error(f"Error reading file {entry.path}: {str(file_stat)}")
+                    continue
+                yield self._make_task(entry.path, entry.name, lower_name[lower_name.rfind('.'):], file_stat)
+
+    def upload_file(self, file_path: str, folder_id: str,
+                    remote_files: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Upload a single file to the API. Returns the file ID if successful.
+
+        remote_files is a known listing of the folder, used to skip files that already exist
+        there; without it the folder is listed first.
+        """
+        name = os.path.basename(file_path)
+        try:
+            task = self._make_task(file_path, name, self._extension(name), os.stat(file_path))
+        except OSError as e:
+            logger.error(f"Could not read {file_path}: {str(e)}")
+            return None
+        if not task.parse_engine:
+            logger.error(f"Unsupported file type: {task.ext}")
             return None
+        return self.upload_task(task, folder_id, remote_files)
+
+    def upload_task(self, task: FileTask, folder_id: str, remote_files: Optional[Dict[str, str]] = None,
+                    content_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Upload a file found by the directory scan. Returns the file ID if successful.
 
+        A known content_hash is sent along in the X-Content-Hash header.
+        """
+        file_path, parse_engine = task.path, task.parse_engine
+        extra_headers = {CONTENT_HASH_HEADER: content_hash} if content_hash else {}
         try:
             # Check if file with same name already exists on remote
-            filename = os.path.basename(file_path)
-            remote_files = self.list_remote_files(folder_id)
+            filename = task.name
+            if remote_files is None:
+                remote_files = self._known_remote_files(folder_id)
             
             # If file already exists, return its ID
             if filename in remote_files:
@@ -181,75 +661,304 @@ class FileUploader:
                 logger.info(f"File already exists remotely: {filename}, ID: {file_id}")
                 return file_id
                 
+            if self.zero_copy:
+                result = self._put_file_zero_copy(task, folder_id, extra_headers)
+                return self._file_id_from_response(result, file_path) if result is not None else None
+
             url = f"{self.base_url}/localmind/public-upload/file"
 
             with open(file_path, 'rb') as f:
-                files = {
-                    'file': (filename, f, mimetypes.guess_type(file_path)[0])
-                }
-                # Determine parser engine based on file type
-                file_extension = os.path.splitext(file_path)[1].lower()
-                parse_engine = 'ultraparse' if file_extension in self.ultraparse_types else 'tika'
+                file_field = (filename, f, self._mime_by_ext.get(task.ext))
 
                 params = {
                     'folder_id': folder_id,
                     'parse_engine': parse_engine
                 }
 
-                logger.info(f"Using parser engine: {parse_engine} for file type: {file_extension}")
+                logger.debug("Using parser engine: %s for file type: %s", parse_engine, task.ext)
 
-                logger.info(f"Starting upload for file: {file_path}")
-                response = requests.post(
-                    url,
-                    files=files,
-                    params=params,
-                    headers=self.headers,
-                    verify=self.verify_ssl
-                )
+                logger.debug("Starting upload for file: %s", file_path)
+                response = self._post_files(url, [('file', file_field)], params, extra_headers)
 
                 response.raise_for_status()
-                result = response.json()
-                
-                # Extract file ID from response - API might return ID directly or in a data structure
-                file_id = None
-                if isinstance(result, dict):
-                    file_id = result.get("id")
-                elif isinstance(result, str):
-                    # Some APIs return just the ID as a string
-                    file_id = result
-                
-                if not file_id:
-                    # Look for ID in other common response formats
-                    if isinstance(result, dict) and "data" in result and isinstance(result["data"], dict):
-                        file_id = result["data"].get("id")
-                
-                if not file_id and "status" in result:
-                    # The API appears to be returning a status but not a clear ID
-                    # This is a special case to handle the response format shown in logs
-                    logger.info(f"File appears to be uploaded successfully, but no clear ID was found")
-                    
-                    # Wait briefly for the server to process the upload
-                    time.sleep(1)
-                    
-                    # Try to find the file by listing files again
-                    updated_remote_files = self.list_remote_files(folder_id)
-                    if filename in updated_remote_files:
-                        file_id = updated_remote_files[filename]
-                        logger.info(f"Retrieved file ID after upload: {file_id}")
-                
-                if file_id:
-                    logger.info(f"Successfully uploaded file: {file_path}, ID: {file_id}")
-                else:
-                    logger.warning(f"No file ID found in response for {file_path}: {result}")
-                    
-                logger.debug(f"API Response: {result}")
-                return file_id
+                return self._file_id_from_response(response.json(), file_path)
 
-        except requests.exceptions.RequestException as e:
+        except self._http_errors as e:
             logger.error(f"Upload failed for {file_path}: {str(e)}")
-            if hasattr(e, 'response') and hasattr(e.response, 'text'):
-                logger.error(f"Server response: {e.response.text}")
+            response_text = getattr(getattr(e, 'response', None), 'text', None)
+            if response_text:
+                logger.error(f"Server response: {response_text}")
             return None
+        except ValueError as e:
+            # Not every backend's JSON errors are HTTP errors, so catch decoding failures on their own
+            logger.error(f"Upload failed for {file_path}: invalid JSON response: {str(e)}")
+            return None
+        except OSError as e:
+            logger.error(f"Could not read {file_path}: {str(e)}")
+            return None
+
+    def _known_remote_files(self, folder_id: str) -> Dict[str, str]:
+        """Return the listing fetched at the start of the current sync, or list the folder now."""
+        remote_files = self._remote_cache.get(folder_id)
+        return remote_files if remote_files is not None else self.list_remote_files(folder_id)
+
+    def _put_file_zero_copy(self, task: FileTask, folder_id: str, extra_headers: Optional[Dict] = None):
+        """
+        Upload a file as a raw request body using socket.sendfile.
+
+        The kernel copies the file from the page cache to the socket without passing it
+        through Python. Returns the decoded API response, or None on failure.
+        """
+        file_path = task.path
+        url = urlsplit(self.base_url)
+        query = urlencode({
+            'folder_id': folder_id,
+            'parse_engine': task.parse_engine,
+            'filename': task.name
+        })
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+        try:
+            with open(file_path, 'rb') as f:
+                connection.putrequest('PUT', f"{url.path}/localmind/public-upload/file/raw?{query}")
+                for name, value in {**self.headers, **(extra_headers or {})}.items():
+                    connection.putheader(name, value)
+                connection.putheader('Content-Type', 'application/octet-stream')
+                # fstat the open file rather than trusting the scan, in case it changed since, and send
+                # exactly that many bytes so a file that grows meanwhile cannot overrun the body
+                size = os.fstat(f.fileno()).st_size
+                connection.putheader('Content-Length', str(size))
+                connection.endheaders()
+                logger.debug("Starting zero-copy upload for file: %s", file_path)
+                if connection.sock.sendfile(f, 0, size) != size:
+                    raise OSError(f"{file_path} shrank during upload")
+
+            response = connection.getresponse()
+            body = response.read()
+            if response.status >= 400:
+                logger.error(f"Upload failed for {file_path}: {response.status} {response.reason}")
+                logger.error(f"Server response: {body.decode('utf-8', 'replace')}")
+                return None
+            return json.loads(body)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logger.error(f"Upload failed for {file_path}: {str(e)}")
+            return None
+        finally:
+            connection.close()
+
+    def _post_files(self, url: str, fields: List[Tuple[str, Tuple]], params: Dict,
+                    headers: Optional[Dict] = None):
+        """
+        POST a multipart upload of (field name, file tuple) pairs.
+
+        The body is streamed from disk when requests-toolbelt is available.
+        """
+        if self.backend == 'requests' and MultipartEncoder is not None:
+            encoder = RewindableMultipartEncoder(fields)
+            return self.session.post(url, data=encoder, params=params,
+                                     headers={**(headers or {}), 'Content-Type': encoder.content_type})
+        # requests builds the whole body in memory here; httpx streams it on its own
+        return self.session.post(url, files=fields, params=params, headers=headers)
+
+    def _file_id_from_response(self, result, file_path: str) -> Optional[str]:
+        """
+        Extract the remote file ID from an upload response.
+
+        Returns None if the response holds no ID; sync_directory then looks such uploads up in
+        a single folder listing once all uploads have finished.
+        """
+        # Extract file ID from response - API might return ID directly or in a data structure
+        file_id = None
+        if isinstance(result, dict):
+            file_id = result.get("id")
+        elif isinstance(result, str):
+            # Some APIs return just the ID as a string
+            file_id = result
+        
+        if not file_id:
+            # Look for ID in other common response formats
+            if isinstance(result, dict) and "data" in result and isinstance(result["data"], dict):
+                file_id = result["data"].get("id")
+        
+        if file_id:
+            logger.debug("Successfully uploaded file: %s, ID: %s", file_path, file_id)
+        elif "status" in result:
+            # The API appears to be returning a status but not a clear ID
+            # This is a special case to handle the response format shown in logs
+            logger.info(f"File appears to be uploaded successfully, but no clear ID was found: {file_path}")
+        else:
+            logger.warning(f"No file ID found in response for {file_path}: {result}")
+            
+        logger.debug("API Response: %s", result)
+        return file_id
+
+    async def _upload_file_async(self, client, task: FileTask, folder_id: str, semaphore: asyncio.Semaphore):
+        """Upload a single file on the event loop. Returns the decoded API response, or None on failure."""
+        async with semaphore:
+            url = f"{self.base_url}/localmind/public-upload/file"
+            params = {
+                'folder_id': folder_id,
+                'parse_engine': task.parse_engine
+            }
+            file_path = task.path
+            try:
+                with open(file_path, 'rb') as f:
+                    files = {'file': (task.name, f, self._mime_by_ext.get(task.ext))}
+                    logger.debug("Starting upload for file: %s", file_path)
+                    response = await client.post(url, files=files, params=params)
+                response.raise_for_status()
+                return response.json()
+            except self._http_errors as e:
+                logger.error(f"Upload failed for {file_path}: {str(e)}")
+                response_text = getattr(getattr(e, 'response', None), 'text', None)
+                if response_text:
+                    logger.error(f"Server response: {response_text}")
+                return None
+            except ValueError as e:
+                # An exception escaping here would make gather() discard every other upload's result
+                logger.error(f"Upload failed for {file_path}: invalid JSON response: {str(e)}")
+                return None
+            except OSError as e:
+                logger.error(f"Could not read {file_path}: {str(e)}")
+                return None
+
+    async def _upload_files_async(self, tasks: List[FileTask], folder_id: str) -> List:
+        """
+        Upload files over one AsyncClient, returning the decoded API responses in order.
+
+        Small and large files are capped separately, mirroring the two thread pools.
+        """
+        import httpx
+        small_semaphore = asyncio.Semaphore(self.parallel)
+        large_semaphore = asyncio.Semaphore(self.large_file_workers)
+        async with httpx.AsyncClient(**self._httpx_options()) as client:
+            return await asyncio.gather(*(
+                self._upload_file_async(
+                    client, task, folder_id,
+                    large_semaphore if task.size > self.large_file_threshold else small_semaphore
+                )
+                for task in tasks
+            ))
+
+    def _upload_many(self, tasks: List[FileTask], folder_id: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Upload files concurrently, yielding (file_path, file_id) as each upload finishes.
+
+        Each task's size decides whether it goes through the small-file or the large-file pool.
+        """
+        if self.batch_size > 0:
+            yield from self._upload_many_batched(tasks, folder_id)
+            return
+        if self.backend == 'httpx-async':
+            yield from self._upload_many_async(tasks, folder_id)
+            return
+
+        futures = {}
+        for task in tasks:
+            pool = self.large_pool if task.size > self.large_file_threshold else self.pool
+            futures[pool.submit(self.upload_task, task, folder_id)] = task.path
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def _upload_many_batched(self, tasks: List[FileTask], folder_id: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """Upload small files in batches of batch_size per request, grouped by parser engine."""
+        futures = {}
+        batches = {}  # Maps parse engine -> small file paths
+        for task in tasks:
+            if task.size > self.large_file_threshold:
+                # Large files gain nothing from batching, so they keep their own requests
+                futures[self.large_pool.submit(self.upload_task, task, folder_id)] = task.path
+            else:
+                batches.setdefault(task.parse_engine, []).append(task.path)
+
+        for parse_engine, file_paths in batches.items():
+            for start in range(0, len(file_paths), self.batch_size):
+                batch = file_paths[start:start + self.batch_size]
+                futures[self.pool.submit(self.upload_batch, batch, folder_id, parse_engine)] = None
+
+        for future in as_completed(futures):
+            file_path = futures[future]
+            if file_path is None:
+                yield from future.result().items()
+            else:
+                yield file_path, future.result()
+
+    def upload_batch(self, file_paths: List[str], folder_id: str, parse_engine: str) -> Dict[str, Optional[str]]:
+        """
+        Upload several files in a single request to the batch endpoint.
+
+        All files must use the same parser engine. Returns a dict of file path to
+        file ID, with None for files that could not be uploaded.
+        """
+        file_ids = dict.fromkeys(file_paths)
+        url = f"{self.base_url}/localmind/public-upload/batch"
+        params = {
+            'folder_id': folder_id,
+            'parse_engine': parse_engine
+        }
+
+        try:
+            with ExitStack() as stack:
+                files = []
+                for file_path in file_paths:
+                    filename = os.path.basename(file_path)
+                    files.append(('file', (filename, stack.enter_context(open(file_path, 'rb')),
+                                           self._mime_by_ext.get(self._extension(filename)))))
+                logger.info(f"Starting batch upload of {len(file_paths)} files with parser engine: {parse_engine}")
+                response = self._post_files(url, files, params)
+
+            response.raise_for_status()
+            result = response.json()
+        except self._http_errors as e:
+            logger.error(f"Batch upload of {len(file_paths)} files failed: {str(e)}")
+            response_text = getattr(getattr(e, 'response', None), 'text', None)
+            if response_text:
+                logger.error(f"Server response: {response_text}")
+            return file_ids
+        except ValueError as e:
+            logger.error(f"Batch upload of {len(file_paths)} files failed: invalid JSON response: {str(e)}")
+            return file_ids
+        except OSError as e:
+            logger.error(f"Could not read files for batch upload: {str(e)}")
+            return file_ids
+
+        # The batch endpoint reports the uploaded files as a list of {"id", "name"} entries
+        entries = result.get("data", []) if isinstance(result, dict) else result
+        ids_by_name = {}
+        for entry in entries or []:
+            if isinstance(entry, dict) and entry.get("id") and entry.get("name"):
+                ids_by_name[entry["name"]] = entry["id"]
+
+        if any(os.path.basename(file_path) not in ids_by_name for file_path in file_paths):
+            # Fall back to one folder listing for any IDs missing from the response
+            for filename, file_id in self.list_remote_files(folder_id).items():
+                ids_by_name.setdefault(filename, file_id)
+
+        for file_path in file_paths:
+            file_ids[file_path] = ids_by_name.get(os.path.basename(file_path))
+
+        logger.info(f"Batch upload complete: {sum(1 for i in file_ids.values() if i)} of {len(file_paths)} files")
+        logger.debug("API Response: %s", result)
+        return file_ids
+
+    def _upload_many_async(self, tasks: List[FileTask], folder_id: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """Upload files on an asyncio event loop, yielding (file_path, file_id) once all have finished."""
+        # Check for files that already exist on remote once, rather than once per upload
+        remote_files = self._known_remote_files(folder_id)
+        uploads = []
+        for task in tasks:
+            filename = task.name
+            if filename in remote_files:
+                logger.info(f"File already exists remotely: {filename}, ID: {remote_files[filename]}")
+                yield task.path, remote_files[filename]
+            else:
+                uploads.append(task)
+
+        results = asyncio.run(self._upload_files_async(uploads, folder_id))
+        for task, result in zip(uploads, results):
+            if result is None:
+                yield task.path, None
+            else:
+                yield task.path, self._file_id_from_response(result, task.path)
 
     def delete_file(self, file_id: str, folder_id: str) -> bool:
         """Delete a file from the remote system."""
@@ -264,23 +973,21 @@ class FileUploader:
                 'file_ids': [file_id]
             }
             
-            logger.info(f"Deleting file with ID: {file_id}")
-            response = requests.delete(
-                url,
-                json=data,
-                params=params,
-                headers=self.headers,
-                verify=self.verify_ssl
-            )
+            logger.debug("Deleting file with ID: %s", file_id)
+            # httpx only accepts a JSON body through the generic request method
+            response = self.session.request('DELETE', url, json=data, params=params)
             
             response.raise_for_status()
-            logger.info(f"Successfully deleted file with ID: {file_id}")
+            # The folder's cached listing now names a file that no longer exists
+            self._remote_cache.pop(folder_id, None)
+            logger.debug("Successfully deleted file with ID: %s", file_id)
             return True
             
-        except requests.exceptions.RequestException as e:
+        except self._http_errors as e:
             logger.error(f"Delete failed for file ID {file_id}: {str(e)}")
-            if hasattr(e, 'response') and hasattr(e.response, 'text'):
-                logger.error(f"Server response: {e.response.text}")
+            response_text = getattr(getattr(e, 'response', None), 'text', None)
+            if response_text:
+                logger.error(f"Server response: {response_text}")
             return False
 
     def list_remote_files(self, folder_id: str) -> Dict[str, str]:
@@ -288,34 +995,80 @@ class FileUploader:
         try:
             url = f"{self.base_url}/localmind/public-upload/folders/{folder_id}/files"
             
-            logger.info(f"Listing files in folder ID: {folder_id}")
-            response = requests.get(
-                url,
-                headers=self.headers,
-                verify=self.verify_ssl
-            )
+            logger.debug("Listing files in folder ID: %s", folder_id)
+            response = self.session.get(url)
             
             response.raise_for_status()
-            result = response.json()
+            # Large folders make this listing the main JSON parsing cost, so skip response.json()
+            result = _json_loads(response.content)
             
-            files_dict = {}
-            for file_info in result.get("data", []):
-                file_id = file_info.get("id")
-                file_name = file_info.get("name")
-                if file_id and file_name:
-                    files_dict[file_name] = file_id
+            files_dict = {file_info["name"]: file_info["id"] for file_info in result.get("data", ())
+                          if file_info.get("id") and file_info.get("name")}
             
-            logger.info(f"Found {len(files_dict)} files in folder ID: {folder_id}")
+            logger.debug("Found %d files in folder ID: %s", len(files_dict), folder_id)
             return files_dict
             
-        except requests.exceptions.RequestException as e:
+        except self._http_errors as e:
             logger.error(f"List files failed for folder ID {folder_id}: {str(e)}")
-            if hasattr(e, 'response') and hasattr(e.response, 'text'):
-                logger.error(f"Server response: {e.response.text}")
+            response_text = getattr(getattr(e, 'response', None), 'text', None)
+            if response_text:
+                logger.error(f"Server response: {response_text}")
             # Return empty dict instead of failing - this allows uploads to continue
             return {}
+        except json.JSONDecodeError as e:
+            logger.error(f"List files failed for folder ID {folder_id}: invalid JSON response: {str(e)}")
+            return {}
+
+    def remote_content_hash(self, file_id: str) -> Optional[str]:
+        """Return the content hash the server reports for a file, or None if it reports none."""
+        url = f"{self.base_url}/localmind/public-upload/files/{file_id}"
+        try:
+            response = self.session.head(url)
+        except self._http_errors as e:
+            logger.debug("Could not fetch content hash for file ID %s: %s", file_id, e)
+            return None
+        if response.status_code >= 400:
+            return None
+        return response.headers.get(CONTENT_HASH_HEADER)
+
+    def _replace_file(self, task: FileTask, file_id: str, folder_id: str,
+                      content_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Delete the remote version of a file and upload the local one. Returns the new file ID.
+
+        If the server already holds content with the same hash, nothing is sent and the
+        existing file ID is returned.
+        """
+        if content_hash and self.remote_content_hash(file_id) == content_hash:
+            logger.debug("Remote content of %s is unchanged, skipping upload", task.path)
+            return file_id
+        if not self.delete_file(file_id, folder_id):
+            return None
+        # The old version was just deleted, so there is no existing remote file to look for
+        return self.upload_task(task, folder_id, remote_files={}, content_hash=content_hash)
+
+    def _hash_in_background(self, file_paths: Iterable[str]) -> Dict[str, Future]:
+        """Start hashing files on the hash pool. Returns a dict of file path to hash future."""
+        return {file_path: self.hash_pool.submit(self.tracker.compute_file_hash, file_path)
+                for file_path in file_paths}
+
+    @staticmethod
+    def _directory_digest(tasks: Iterable[FileTask], remote_files: Dict[str, str]) -> str:
+        """
+        Digest the scanned files' paths, sizes and mtimes together with the remote listing.
 
-    def sync_directory(self, local_path: str, folder_id: str) -> Dict:
+        Nothing is hashed, so the digest costs no more than the scan and listing themselves.
+        """
+        digest = hashlib.sha256()
+        for entry in sorted(f"{task.path}\0{task.size}\0{task.mtime!r}" for task in tasks):
+            digest.update(entry.encode('utf-8', 'surrogateescape') + b"\n")
+        digest.update(b"\0")
+        for name, file_id in sorted(remote_files.items()):
+            digest.update(f"{name}\0{file_id}\n".encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    def sync_directory(self, local_path: str, folder_id: str,
+                       exclude_dirs: Optional[Iterable[str]] = None) -> Dict:
         """
         Synchronize a local directory with a remote folder.
         
@@ -324,12 +1077,23 @@ class FileUploader:
         2. Update changed files (delete + upload)
         3. Delete files that no longer exist locally
         
+        Subdirectories listed in exclude_dirs are not walked. If neither the local files nor
+        the remote listing changed since the last sync that found nothing to do, all files are
+        skipped without checking them one by one.
         Returns statistics about operations performed.
         """
         if not os.path.isdir(local_path):
             logger.error(f"Directory does not exist: {local_path}")
             return {"error": f"Directory does not exist: {local_path}"}
 
+        excluded = set()
+        for exclude_dir in exclude_dirs or ():
+            try:
+                dir_stat = os.stat(exclude_dir)
+            except OSError:
+                continue
+            excluded.add((dir_stat.st_dev, dir_stat.st_ino))
+
         logger.info(f"Syncing directory: {local_path} with folder ID: {folder_id}")
         
         # Track statistics
@@ -344,25 +1108,34 @@ class FileUploader:
         # Fetch remote files first
         remote_files_dict = self.list_remote_files(folder_id)
         remote_filenames = set(remote_files_dict.keys())
+        # Uploads in this sync check against this listing instead of listing the folder again
+        self._remote_cache[folder_id] = remote_files_dict
         logger.info(f"Found {len(remote_filenames)} files in remote folder {folder_id}")
         
         # Get current files in directory
-        current_files = set()
         local_filenames_map = {}  # Maps filename -> full path
+        local_tasks = {}  # Maps full path -> FileTask from the directory scan
         
-        for root, _, files in os.walk(local_path):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                if self.validate_file(file_path):
-                    current_files.add(file_path)
-                    # Map the basename to full path for later lookups
-                    local_filenames_map[os.path.basename(file_path)] = file_path
+        for task in self._iter_files(local_path, excluded):
+            file_path = task.path
+            local_tasks[file_path] = task
+            # Map the basename to full path for later lookups
+            local_filenames_map[task.name] = file_path
+
+        # A periodic full check compares content too, catching edits that kept size and mtime
+        verify_content = self.force or self.tracker.full_check_due(local_path, self.full_check_interval)
+        dir_digest = self._directory_digest(local_tasks.values(), remote_files_dict)
+        if not verify_content and dir_digest == self.tracker.get_dir_digest(local_path):
+            self._remote_cache.pop(folder_id, None)
+            stats["skipped"] = len(local_tasks)
+            logger.info(f"Directory unchanged since last sync: {local_path}. Stats: {stats}")
+            return stats
         
         # Get previously tracked files
         tracked_files = self.tracker.get_tracked_files(local_path)
         
         # Get local filenames (basenames only)
-        local_filenames = set(os.path.basename(f) for f in current_files)
+        local_filenames = set(local_filenames_map)
         
         # Identify files by name comparison
         new_file_names = local_filenames - remote_filenames
@@ -370,43 +1143,76 @@ class FileUploader:
         deleted_file_names = remote_filenames - local_filenames
         
         # Process new files (upload)
+        pending_uploads = {}  # Maps full path -> metadata
         for filename in new_file_names:
-            file_path = local_filenames_map[filename]
-            metadata = self.tracker.get_file_metadata(file_path)
+            task = local_tasks[local_filenames_map[filename]]
+            metadata = self.tracker.get_file_metadata(task.path, task.size, task.mtime)
             if not metadata:
-                logger.error(f"Failed to get metadata for {file_path}")
+                logger.error(f"Failed to get metadata for {task.path}")
                 stats["failed"] += 1
                 continue
-                
-            file_id = self.upload_file(file_path, folder_id)
+            pending_uploads[task.path] = metadata
+
+        # Hash the new files while they upload, for their tracking records
+        upload_hashes = self._hash_in_background(pending_uploads)
+        upload_tasks = [local_tasks[file_path] for file_path in pending_uploads]
+        unconfirmed_uploads = []  # Full paths of uploads that returned no file ID
+        for file_path, file_id in self._upload_many(upload_tasks, folder_id):
+            metadata = pending_uploads[file_path]
+            metadata["hash"] = upload_hashes[file_path].result()
             if file_id:
                 self.tracker.update_file_tracking(local_path, file_id, metadata)
                 stats["added"] += 1
                 logger.info(f"Successfully added file: {file_path}")
             else:
-                # Special handling for the case where upload succeeds but we don't get an ID
-                # Check if the file now exists remotely
-                updated_remote_files = self.list_remote_files(folder_id)
+                unconfirmed_uploads.append(file_path)
+
+        if unconfirmed_uploads:
+            # Special handling for the case where upload succeeds but we don't get an ID
+            # Check once whether these files now exist remotely
+            updated_remote_files = self.list_remote_files(folder_id)
+            for file_path in unconfirmed_uploads:
+                filename = local_tasks[file_path].name
                 if filename in updated_remote_files and filename not in remote_filenames:
                     # File was actually uploaded successfully
                     file_id = updated_remote_files[filename]
-                    self.tracker.update_file_tracking(local_path, file_id, metadata)
+                    self.tracker.update_file_tracking(local_path, file_id, pending_uploads[file_path])
                     stats["added"] += 1
                     logger.info(f"Successfully added file (verified after upload): {file_path}")
                 else:
                     stats["failed"] += 1
         
         # Process existing files (check for changes)
+        if verify_content and not self.force:
+            logger.info(f"Running periodic full content check for {local_path}")
+        pending_checks = []  # Existing files that need their content hash
         for filename in existing_file_names:
             file_path = local_filenames_map[filename]
-            metadata = self.tracker.get_file_metadata(file_path)
+            task = local_tasks[file_path]
+
+            # Files whose size and mtime match the last sync are skipped without hashing them
+            if (not verify_content
+                    and self.tracker.get_file_id(local_path, file_path) == remote_files_dict[filename]
+                    and self.tracker.matches_last_sync(local_path, file_path, task.size, task.mtime)):
+                stats["skipped"] += 1
+                logger.debug("Skipped unchanged file: %s", file_path)
+                continue
+            pending_checks.append(file_path)
+
+        # Every remaining file either gets a new tracking record or, with --force, a content
+        # comparison, so hash them all in parallel up front
+        check_hashes = self._hash_in_background(pending_checks)
+        pending_updates = {}  # Maps full path -> metadata of changed files
+        for file_path in pending_checks:
+            task = local_tasks[file_path]
+            remote_file_id = remote_files_dict[task.name]
+
+            metadata = self.tracker.get_file_metadata(file_path, task.size, task.mtime)
             if not metadata:
                 logger.error(f"Failed to get metadata for {file_path}")
                 stats["failed"] += 1
                 continue
-            
-            # Get the remote file ID
-            remote_file_id = remote_files_dict[filename]
+            metadata["hash"] = check_hashes[file_path].result()
             
             # Update tracking data with the remote ID if not already tracked
             if file_path not in tracked_files:
@@ -415,19 +1221,9 @@ class FileUploader:
                 logger.info(f"File already exists remotely, updated tracking: {file_path}")
                 continue
                 
-            if self.tracker.is_file_changed(local_path, file_path, metadata):
-                # File changed, delete old version and upload new
-                if self.delete_file(remote_file_id, folder_id):
-                    # Upload new version
-                    new_file_id = self.upload_file(file_path, folder_id)
-                    if new_file_id:
-                        self.tracker.update_file_tracking(local_path, new_file_id, metadata)
-                        stats["updated"] += 1
-                        logger.info(f"Successfully updated file: {file_path}")
-                    else:
-                        stats["failed"] += 1
-                else:
-                    stats["failed"] += 1
+            if self.tracker.is_file_changed(local_path, file_path, metadata, verify_hash=verify_content):
+                # File changed, replaced below together with the other changed files
+                pending_updates[file_path] = metadata
             else:
                 # Make sure tracking data has the correct remote ID
                 old_file_id = self.tracker.get_file_id(local_path, file_path)
@@ -437,12 +1233,52 @@ class FileUploader:
                 
                 # File unchanged
                 stats["skipped"] += 1
-                logger.info(f"Skipped unchanged file: {file_path}")
+                logger.debug("Skipped unchanged file: %s", file_path)
+        
+        # Replace changed files concurrently, each deleting the old version before uploading the new one
+        futures = {}
+        for file_path in pending_updates:
+            task = local_tasks[file_path]
+            pool = self.large_pool if task.size > self.large_file_threshold else self.pool
+            remote_file_id = remote_files_dict[task.name]
+            future = pool.submit(self._replace_file, task, remote_file_id, folder_id,
+                                 pending_updates[file_path]["hash"])
+            futures[future] = (file_path, remote_file_id)
+        unconfirmed_updates = []  # (full path, old file ID) of replacements that returned no file ID
+        for future in as_completed(futures):
+            file_path, remote_file_id = futures[future]
+            new_file_id = future.result()
+            if not new_file_id:
+                unconfirmed_updates.append((file_path, remote_file_id))
+                continue
+            self.tracker.update_file_tracking(local_path, new_file_id, pending_updates[file_path])
+            if new_file_id == remote_file_id:
+                # The server already had this content, only the tracking data was stale
+                stats["skipped"] += 1
+                logger.info(f"Remote file already up to date, updated tracking: {file_path}")
+            else:
+                stats["updated"] += 1
+                logger.info(f"Successfully updated file: {file_path}")
+
+        if unconfirmed_updates:
+            # As for new files, check once whether the new versions now exist remotely
+            updated_remote_files = self.list_remote_files(folder_id)
+            for file_path, old_file_id in unconfirmed_updates:
+                file_id = updated_remote_files.get(local_tasks[file_path].name)
+                # The old ID is still listed if its delete failed
+                if file_id and file_id != old_file_id:
+                    self.tracker.update_file_tracking(local_path, file_id, pending_updates[file_path])
+                    stats["updated"] += 1
+                    logger.info(f"Successfully updated file (verified after upload): {file_path}")
+                else:
+                    stats["failed"] += 1
         
         # Process deleted files
-        for filename in deleted_file_names:
-            file_id = remote_files_dict[filename]
-            if self.delete_file(file_id, folder_id):
+        futures = {self.pool.submit(self.delete_file, remote_files_dict[filename], folder_id): filename
+                   for filename in deleted_file_names}
+        for future in as_completed(futures):
+            filename = futures[future]
+            if future.result():
                 # Find and remove from tracking if it exists
                 deleted_paths = [p for p in tracked_files if os.path.basename(p) == filename]
                 for path in deleted_paths:
@@ -452,21 +1288,57 @@ class FileUploader:
             else:
                 stats["failed"] += 1
         
+        self._remote_cache.pop(folder_id, None)
+        if verify_content:
+            self.tracker.mark_full_check(local_path)
+        # Only a sync that changed nothing saw the same listing and files the next sync will see
+        clean = not (stats["added"] or stats["updated"] or stats["deleted"] or stats["failed"])
+        self.tracker.set_dir_digest(local_path, dir_digest if clean else None)
+        self.tracker.flush()
         logger.info(f"Directory sync complete for {local_path}. Stats: {stats}")
         return stats
 
+    @staticmethod
+    def _find_nested_mappings(local_paths: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Map each local path to the other mapped paths inside it, comparing resolved paths.
+
+        A file below a nested mapping belongs to that more specific mapping, so the
+        outer directory's walk skips the nested subtree instead of uploading it twice.
+        """
+        resolved = sorted((os.path.realpath(local_path), local_path) for local_path in local_paths)
+        real_paths = [real_path for real_path, _ in resolved]
+        nested = {}
+        for real_path, local_path in resolved:
+            prefix = os.path.join(real_path, '')
+            # Paths below prefix sort directly after it, so they form one contiguous run
+            index = bisect_left(real_paths, prefix)
+            while index < len(real_paths) and real_paths[index].startswith(prefix):
+                inner_real_path, inner_path = resolved[index]
+                index += 1
+                if inner_real_path == real_path:
+                    continue
+                logger.warning(f"Mapped directory {inner_path} is inside mapped directory {local_path}, "
+                               f"its files are only synced to its own folder")
+                nested.setdefault(local_path, []).append(inner_path)
+        return nested
+
     def sync_all_mappings(self) -> Dict[str, Dict]:
         """Synchronize all directory mappings."""
         results = {}
+        nested_mappings = self._find_nested_mappings(self.folder_mapping)
 
-        for local_path, folder_id in self.folder_mapping.items():
-            if os.path.isdir(local_path):
-                dir_results = self.sync_directory(local_path, folder_id)
+        try:
+            for local_path, folder_id in self.folder_mapping.items():
+                # sync_directory checks that the directory exists and reports it if not
+                dir_results = self.sync_directory(local_path, folder_id, nested_mappings.get(local_path))
                 results[local_path] = dir_results
-                logger.info(f"Directory {local_path}: Sync completed with folder ID {folder_id}")
-            else:
-                logger.error(f"Directory does not exist: {local_path}")
-                results[local_path] = {"error": "Directory does not exist"}
+                if "error" not in dir_results:
+                    logger.info(f"Directory {local_path}: Sync completed with folder ID {folder_id}")
+        finally:
+            self._remote_cache.clear()
+            # Keep what was synced so far, even if a directory sync was interrupted
+            self.tracker.flush()
 
         return results
 
@@ -474,13 +1346,13 @@ class FileUploader:
 def load_mapping_file(file_path: str) -> Dict[str, str]:
     """Load folder mappings from a JSON file."""
     try:
-        with open(file_path, 'r') as f:
-            mapping = json.load(f)
+        mapping = _json_loads(Path(file_path).read_bytes())
         
-        # Validate the structure
-        for local_path, folder_id in mapping.items():
-            if not isinstance(local_path, str) or not isinstance(folder_id, str):
-                logger.error(f"Invalid mapping entry: {local_path} -> {folder_id}")
+        # Validate the structure in a single pass, reporting the first bad entry
+        invalid = next(((local_path, folder_id) for local_path, folder_id in mapping.items()
+                        if not (isinstance(local_path, str) and isinstance(folder_id, str))), None)
+        if invalid is not None:
+            logger.error(f"Invalid mapping entry: {invalid[0]} -> {invalid[1]}")
         
         return mapping
     except (json.JSONDecodeError, IOError) as e:
@@ -488,6 +1360,22 @@ def load_mapping_file(file_path: str) -> Dict[str, str]:
         return {}
 
 
+def positive_int(value: str) -> int:
+    """argparse type for options that need a value of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for options that need a value of at least 0."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(description='Sync files between local directories and remote API')
     parser.add_argument('--base-url', required=True, help='Base URL of the API')
@@ -507,8 +1395,40 @@ def main():
     parser.add_argument('--tracking-file', default='file_tracking.json',
                        help='JSON file to track file changes (default: file_tracking.json)')
     
+    parser.add_argument('--force', action='store_true',
+                       help='Hash every tracked file to detect changes, even if its size and '
+                            'modification time are unchanged')
+    parser.add_argument('--full-check-interval', type=float, default=0, metavar='DAYS',
+                       help='Hash and compare every tracked file once every this many days, as with --force '
+                            '(default: 0, never)')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
     parser.add_argument('--verify-ssl', action='store_true', help='Verify SSL certificates')
+    parser.add_argument('--parallel', type=positive_int, default=8,
+                       help='Number of files to upload concurrently (default: 8)')
+    parser.add_argument('--large-file-threshold', type=non_negative_int,
+                       default=SMALL_FILE_THRESHOLD // (1024 * 1024), metavar='MB',
+                       help='Files larger than this many MB use the large-file upload pool (default: 8)')
+    parser.add_argument('--large-file-workers', type=positive_int, default=4,
+                       help='Number of large files to upload concurrently (default: 4)')
+    parser.add_argument('--batch-size', type=non_negative_int, default=0,
+                       help='Upload up to this many small files per request via the batch endpoint '
+                            '(default: 0, disabled)')
+    parser.add_argument('--zero-copy', action='store_true',
+                       help='Send files as raw bodies with sendfile() instead of multipart uploads '
+                            '(plain http:// only)')
+    parser.add_argument('--stat-workers', type=non_negative_int, default=0,
+                       help='Number of files to stat concurrently while scanning, useful on network '
+                            'shares (default: 0, one at a time)')
+    parser.add_argument('--backend', choices=['requests', 'httpx', 'httpx-async'], default='requests',
+                       help='HTTP client to use; httpx multiplexes uploads over HTTP/2 and httpx-async '
+                            'runs them on an asyncio event loop (default: requests)')
+    parser.add_argument('--ignore-dir', action='append', metavar='NAME',
+                       help='Directory name to skip during sync, in addition to '
+                            f'{", ".join(sorted(DEFAULT_IGNORE_DIRS))} (can be specified multiple times)')
+    parser.add_argument('--include-hidden', action='store_true',
+                       help='Also sync directories whose name starts with a dot')
+    parser.add_argument('--follow-symlinks', action='store_true',
+                       help='Follow symbolic links to files and directories (skipped by default)')
 
     args = parser.parse_args()
 
@@ -539,10 +1459,21 @@ def main():
     tracker = FileTracker(args.tracking_file)
     
     # Create uploader with folder mapping
-    uploader = FileUploader(args.base_url, args.api_key, folder_mapping, tracker, verify_ssl=args.verify_ssl)
+    uploader = FileUploader(args.base_url, args.api_key, folder_mapping, tracker,
+                            verify_ssl=args.verify_ssl, parallel=args.parallel,
+                            ignore_dirs=args.ignore_dir, include_hidden=args.include_hidden,
+                            backend=args.backend,
+                            large_file_threshold=args.large_file_threshold * 1024 * 1024,
+                            large_file_workers=args.large_file_workers,
+                            batch_size=args.batch_size, follow_symlinks=args.follow_symlinks,
+                            force=args.force, zero_copy=args.zero_copy, stat_workers=args.stat_workers,
+                            full_check_interval=args.full_check_interval)
 
     # Sync files from all mappings
-    results = uploader.sync_all_mappings()
+    try:
+        results = uploader.sync_all_mappings()
+    finally:
+        uploader.close()
     
     # Calculate totals
     total_added = sum(result.get("added", 0) for result in results.values())
@@ -0,0 +1,56 @@
+"""
+Check that a mapped directory which is itself a symlink is scanned like a regular one.
+
+A walker that yields nothing for a symlinked root makes sync_directory treat every remote
+file as deleted locally, so this guards against remote deletes. Run with
+`python tests/test_symlinked_root.py` or pytest.
+"""
+import importlib.util
+import os
+import tempfile
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'file-uploader.py')
+
+
+def load_uploader_module(log_dir: str):
+    """Import file-uploader.py, keeping the log file it creates out of the working directory."""
+    cwd = os.getcwd()
+    os.chdir(log_dir)
+    try:
+        spec = importlib.util.spec_from_file_location('file_uploader', SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+def scanned_paths(module, root: str, tracking_file: str, follow_symlinks: bool):
+    uploader = module.FileUploader('http://127.0.0.1:1', 'key', {}, module.FileTracker(tracking_file),
+                                   follow_symlinks=follow_symlinks)
+    try:
+        return sorted(task.path for task in uploader._iter_files(root))
+    finally:
+        uploader.close()
+
+
+def test_symlinked_root():
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_uploader_module(tmp)
+        real = os.path.join(tmp, 'real')
+        link = os.path.join(tmp, 'link')
+        os.makedirs(os.path.join(real, 'sub'))
+        for name in ('a.pdf', 'b.txt', os.path.join('sub', 'c.docx')):
+            with open(os.path.join(real, name), 'w') as f:
+                f.write(name)
+        os.symlink(real, link)
+
+        expected = sorted(os.path.join(link, name) for name in ('a.pdf', 'b.txt', os.path.join('sub', 'c.docx')))
+        for follow_symlinks in (False, True):
+            found = scanned_paths(module, link, os.path.join(tmp, 'tracking.json'), follow_symlinks)
+            assert found == expected, f"follow_symlinks={follow_symlinks}: {found}"
+
+
+if __name__ == '__main__':
+    test_symlinked_root()
+    print("OK")